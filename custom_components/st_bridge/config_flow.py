@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import voluptuous as vol
 from typing import Any
 
 from homeassistant.config_entries import (
@@ -10,24 +9,19 @@ from homeassistant.config_entries import (
     ConfigEntry,
 )
 from homeassistant.core import callback
-from homeassistant.helpers.selector import selector
 
 from .const import (
     DOMAIN,
     CONF_PORT,
     CONF_ENTITIES,
+    CONF_DEBOUNCE_MS,
     DEFAULT_PORT,
+    DEFAULT_DEBOUNCE_MS,
     SUPPORTED_DOMAINS
 )
 
-def _entities_selector():
-    """Return a selector for entity selection."""
-    return selector({
-        "entity": {
-            "multiple": True,
-            "filter": [{"domain": d} for d in sorted(SUPPORTED_DOMAINS)]
-        }
-    })
+_ENTITY_FILTER = tuple({"domain": d} for d in sorted(SUPPORTED_DOMAINS))
+_ENTITY_SELECTOR_SPEC = {"entity": {"multiple": True, "filter": list(_ENTITY_FILTER)}}
 
 class STBridgeConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for ST Bridge."""
@@ -46,6 +40,8 @@ class STBridgeConfigFlow(ConfigFlow, domain=DOMAIN):
                 data={CONF_PORT: user_input[CONF_PORT]},
                 options={CONF_ENTITIES: []},
             )
+        import voluptuous as vol
+
         schema = vol.Schema({
             vol.Required(CONF_PORT, default=DEFAULT_PORT): int,
         })
@@ -71,6 +67,13 @@ class STBridgeOptionsFlow(OptionsFlow):
         """Manage the options."""
         if user_input is not None:
             return self.async_create_entry(title="", data=user_input)
+        import voluptuous as vol
+        from homeassistant.helpers.selector import selector
+
         current = self.entry.options.get(CONF_ENTITIES, [])
-        schema = vol.Schema({vol.Required(CONF_ENTITIES, default=current): _entities_selector()})
+        debounce = self.entry.options.get(CONF_DEBOUNCE_MS, DEFAULT_DEBOUNCE_MS)
+        schema = vol.Schema({
+            vol.Required(CONF_ENTITIES, default=current): selector(_ENTITY_SELECTOR_SPEC),
+            vol.Optional(CONF_DEBOUNCE_MS, default=debounce): vol.All(int, vol.Range(min=0, max=2000)),
+        })
         return self.async_show_form(step_id="init", data_schema=schema)
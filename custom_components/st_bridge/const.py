@@ -5,9 +5,25 @@ DOMAIN = "st_bridge"
 
 CONF_PORT = "port"
 CONF_ENTITIES = "entities"
+CONF_DEBOUNCE_MS = "debounce_ms"
 
 DEFAULT_PORT = 8323
+DEFAULT_DEBOUNCE_MS = 75
 
 SUPPORTED_DOMAINS = {"light", "switch", "fan", "climate"}
 
+# State attributes that SmartThings acts on, per domain
+FORWARD_ATTRS: dict[str, tuple[str, ...]] = {
+    "light": (
+        "brightness", "color_temp", "color_temp_kelvin", "hs_color",
+        "rgb_color", "xy_color", "effect", "color_mode",
+    ),
+    "switch": (),
+    "fan": ("percentage", "preset_mode", "oscillating", "direction"),
+    "climate": (
+        "current_temperature", "temperature", "target_temp_low", "target_temp_high",
+        "hvac_action", "fan_mode", "swing_mode", "preset_mode",
+    ),
+}
+
 LOGGER = logging.getLogger(__package__)
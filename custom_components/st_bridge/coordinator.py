@@ -1,20 +1,147 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Mapping
 from typing import Any, Callable
 
-from homeassistant.core import HomeAssistant, callback, State
+from homeassistant.core import Event, EventStateChangedData, HomeAssistant, callback, State
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.util import dt as dt_util
 
 from .const import (
     CONF_PORT,
     CONF_ENTITIES,
+    CONF_DEBOUNCE_MS,
+    DEFAULT_DEBOUNCE_MS,
+    FORWARD_ATTRS,
     SUPPORTED_DOMAINS,
     LOGGER
 )
 from .discovery import SSDPResponder
 from .server import BridgeServer
 
+
+def _forward_attrs(ent_id: str, a: Mapping[str, Any]) -> dict[str, Any]:
+    """Return the subset of state attributes forwarded to SmartThings."""
+    return {k: a[k] for k in FORWARD_ATTRS.get(ent_id.split(".", 1)[0], ()) if k in a}
+
+
+# =========== Command table ===========
+# (domain, command) -> handler(args) -> (service domain, service, data) or None
+
+ServiceCall = tuple[str, str, dict[str, Any]]
+CommandHandler = Callable[[Mapping[str, Any]], ServiceCall | None]
+
+
+def _plain(domain: str, service: str) -> CommandHandler:
+    """Return a handler calling a service without extra data."""
+    def handler(args: Mapping[str, Any]) -> ServiceCall:
+        return (domain, service, {})
+    return handler
+
+
+def _with_arg(domain: str, service: str, key: str, cast: Callable[[Any], Any]) -> CommandHandler:
+    """Return a handler calling a service with one required argument."""
+    def handler(args: Mapping[str, Any]) -> ServiceCall | None:
+        if key not in args:
+            return None
+        return (domain, service, {key: cast(args[key])})
+    return handler
+
+
+# ----- LIGHT (rich) -----
+# (arg key, cast or None, service data key or None for the same key)
+_LIGHT_ON_KEYS: tuple[tuple[str, Callable[[Any], Any] | None, str | None], ...] = (
+    ("brightness", int, None),  # 0-255
+    # color temp (mireds/kelvin)
+    ("color_temp_mireds", int, "color_temp"),
+    ("color_temp_kelvin", int, "kelvin"),
+    ("color_temp", int, None),
+    # color (hs/rgb/xy) - HA가 알아서 모드 처리
+    ("hs_color", None, None),
+    ("rgb_color", None, None),
+    ("xy_color", None, None),
+    # effect / transition
+    ("effect", str, None),
+    ("transition", float, None),
+)
+
+
+def _light_turn_on(args: Mapping[str, Any]) -> ServiceCall:
+    data: dict[str, Any] = {}
+    for key, cast, target in _LIGHT_ON_KEYS:
+        if key in args:
+            v = args[key]
+            if cast is not None and type(v) is not cast:
+                v = cast(v)
+            data[target or key] = v
+    # brightness_pct:0-100 / level:0-100 override brightness
+    for key in ("brightness_pct", "level"):
+        if key in args:
+            data["brightness"] = round(max(0, min(100, int(args[key]))) * 255 / 100)
+    return ("light", "turn_on", data)
+
+
+# ----- FAN (percentage/preset/oscillate/direction) -----
+def _fan_set_percentage(args: Mapping[str, Any]) -> ServiceCall:
+    data: dict[str, Any] = {}
+    pct = args.get("percentage", args.get("level"))
+    if pct is not None: 
+        data["percentage"] = max(0, min(100, int(pct)))
+    return ("fan", "set_percentage", data)
+
+
+# ----- CLIMATE (mode/setpoint/fan/swing/preset) -----
+def _climate_power(command: str) -> CommandHandler:
+    """Return a handler mapping turn_on/turn_off to set_hvac_mode."""
+    def handler(args: Mapping[str, Any]) -> ServiceCall:
+        mode = "off" if command == "turn_off" else str(args.get("hvac_mode","auto"))
+        return ("climate", "set_hvac_mode", {"hvac_mode": mode})
+    return handler
+
+
+def _climate_set_temperature(args: Mapping[str, Any]) -> ServiceCall:
+    data: dict[str, Any] = {}
+    # single / dual setpoint
+    if "temperature" in args: 
+        data["temperature"] = float(args["temperature"])
+    if "target_temp" in args: 
+        data["temperature"] = float(args["target_temp"])
+    if "target_temp_low" in args: 
+        data["target_temp_low"] = float(args["target_temp_low"])
+    if "target_temp_high" in args: 
+        data["target_temp_high"] = float(args["target_temp_high"])
+    if "hvac_mode" in args: 
+        data["hvac_mode"] = str(args["hvac_mode"])
+    return ("climate", "set_temperature", data)
+
+
+_DISPATCH: dict[tuple[str, str], CommandHandler] = {
+    ("light", "turn_on"): _light_turn_on,
+    ("light", "turn_off"): _plain("light", "turn_off"),
+    ("light", "toggle"): _plain("light", "toggle"),
+    ("switch", "turn_on"): _plain("switch", "turn_on"),
+    ("switch", "turn_off"): _plain("switch", "turn_off"),
+    ("switch", "toggle"): _plain("switch", "toggle"),
+    ("fan", "turn_on"): _plain("fan", "turn_on"),
+    ("fan", "turn_off"): _plain("fan", "turn_off"),
+    ("fan", "toggle"): _plain("fan", "toggle"),
+    ("fan", "set_percentage"): _fan_set_percentage,
+    ("fan", "set_speed"): _fan_set_percentage,
+    ("fan", "set_preset_mode"): _with_arg("fan", "set_preset_mode", "preset_mode", str),
+    ("fan", "oscillate"): _with_arg("fan", "oscillate", "oscillating", bool),
+    ("fan", "set_direction"): _with_arg("fan", "set_direction", "direction", str),
+    ("climate", "set_hvac_mode"): _with_arg("climate", "set_hvac_mode", "hvac_mode", str),
+    ("climate", "turn_on"): _climate_power("turn_on"),
+    ("climate", "turn_off"): _climate_power("turn_off"),
+    ("climate", "set_temperature"): _climate_set_temperature,
+    ("climate", "set_fan_mode"): _with_arg("climate", "set_fan_mode", "fan_mode", str),
+    ("climate", "set_swing_mode"): _with_arg("climate", "set_swing_mode", "swing_mode", str),
+    ("climate", "set_preset_mode"): _with_arg("climate", "set_preset_mode", "preset_mode", str),
+}
+
+
 class BridgeCoordinator:
     """Manages the lifecycle of the ST Bridge server and SSDP responder."""
 
@@ -23,9 +150,25 @@ class BridgeCoordinator:
         self.hass = hass
         self.entry = entry
         self.port: int = entry.data[CONF_PORT]
+        self._selected_sorted: tuple[str, ...] = ()
+        self._selected: frozenset[str] = frozenset()
+        self._entities_cache: list[dict[str, Any]] | None = None
+        self._feat_cache: dict[str, tuple[Mapping[str, Any], dict[str, Any]]] = {}
+        self._last_forward: dict[str, tuple[str, dict[str, Any]]] = {}
+        self._debounce: float = 0
+        self._pending: dict[str, asyncio.TimerHandle] = {}
+        self._latest: dict[str, dict[str, Any]] = {}
         self._unsub_state: Callable[[], None] | None = None
         self._ssdp: SSDPResponder | None = None
         self._server: BridgeServer | None = None
+        self._load_options()
+
+    def _load_options(self) -> None:
+        """Load the selected entities and debounce window from the entry options."""
+        opts = self.entry.options
+        self._selected_sorted = tuple(sorted(set(opts.get(CONF_ENTITIES, []))))
+        self._selected = frozenset(self._selected_sorted)
+        self._debounce = opts.get(CONF_DEBOUNCE_MS, DEFAULT_DEBOUNCE_MS) / 1000
 
     async def async_start(self) -> None:
         """Start the ST Bridge server and SSDP responder."""
@@ -38,16 +181,24 @@ class BridgeCoordinator:
             call_service=self.call_service,  # type: ignore
             get_state_messages=self.get_state_messages,
         )
-        await self._server.start()
-        
-        self._unsub_state = self.hass.bus.async_listen("state_changed", self._on_state_changed)
-        LOGGER.info("ST Bridge started on port %s (entities=%d)", self.port, len(self.entry.options.get(CONF_ENTITIES, [])))
+        try:
+            await self._server.start()
+        except Exception:
+            # e.g. port already in use; don't leave the SSDP socket behind
+            self._server = None
+            await self._ssdp.async_stop()
+            self._ssdp = None
+            raise
+
+        self._track_selected()
+        LOGGER.info("ST Bridge started on port %s (entities=%d)", self.port, len(self._selected))
 
     async def async_stop(self) -> None:
         """Stop the ST Bridge server and SSDP responder."""
         if self._unsub_state:
             self._unsub_state()
             self._unsub_state = None
+        self._cancel_pending()
         if self._ssdp:
             await self._ssdp.async_stop()
             self._ssdp = None
@@ -58,16 +209,34 @@ class BridgeCoordinator:
 
     async def async_handle_entry_update(self) -> None:
         """Handle updates to the config entry."""
+        self._load_options()
+        self._entities_cache = None
+        self._feat_cache.clear()
+        self._last_forward.clear()
+        # Keep pending states of entities that stay selected
+        self._cancel_pending(keep=self._selected)
+        self._track_selected()
         if self._server:
-            await self._server.broadcast_entity_list(self.get_entities())
+            self._server.broadcast_entity_list(self.get_entities())
+
+    def _track_selected(self) -> None:
+        """(Re)subscribe to state changes of the selected entities only."""
+        if self._unsub_state:
+            self._unsub_state()
+            self._unsub_state = None
+        if self._selected:
+            self._unsub_state = async_track_state_change_event(
+                self.hass, self._selected_sorted, self._on_state_changed
+            )
 
     # =========== Entity features ===========
 
     def get_entities(self) -> list[dict[str, Any]]:
         """Get the list of entities to expose to the ST Bridge."""
+        if self._entities_cache is not None:
+            return self._entities_cache
         out: list[dict[str, Any]] = []
-        selected = set(self.entry.options.get(CONF_ENTITIES, []))
-        for ent_id in sorted(selected):
+        for ent_id in self._selected_sorted:
             st: State | None = self.hass.states.get(ent_id)
             if not st: 
                 continue
@@ -78,11 +247,21 @@ class BridgeCoordinator:
                 "entity_id": ent_id,
                 "domain": domain,
                 "friendly_name": st.attributes.get("friendly_name", ent_id),
-                "features": self._infer_features(domain, st.attributes),
+                "features": self._features(ent_id, domain, st.attributes),
             })
+        self._entities_cache = out
         return out
 
-    def _infer_features(self, domain: str, a: dict[str, Any]) -> dict[str, Any]:
+    def _features(self, ent_id: str, domain: str, a: Mapping[str, Any]) -> dict[str, Any]:
+        """Return the features of an entity, reusing them while its attributes are unchanged."""
+        cached = self._feat_cache.get(ent_id)
+        if cached and cached[0] is a:
+            return cached[1]
+        feats = self._infer_features(domain, a)
+        self._feat_cache[ent_id] = (a, feats)
+        return feats
+
+    def _infer_features(self, domain: str, a: Mapping[str, Any]) -> dict[str, Any]:
         """Infer the features of an entity based on its domain and attributes."""
         if domain == "light":
             return {
@@ -117,112 +296,16 @@ class BridgeCoordinator:
 
     # =========== Command routing (spec expanded) ===========
 
-    async def call_service(self, entity_id: str, command: str, args: dict[str, Any]) -> None:
+    async def call_service(self, entity_id: str, command: str, args: Mapping[str, Any]) -> None:
         """Call a service on the specified entity."""
-        domain = entity_id.split(".")[0]
-        data: dict[str, Any] = {"entity_id": entity_id}
-
-        # ----- LIGHT (rich) -----
-        if domain == "light":
-            if command in ("turn_on","turn_off","toggle"):
-                if command == "turn_on":
-                    # brightness: 0-255 / brightness_pct:0-100 / level:0-100
-                    if "brightness" in args: 
-                        data["brightness"] = int(args["brightness"])
-                    if "brightness_pct" in args: 
-                        data["brightness"] = round(max(0,min(100,int(args["brightness_pct"])))*255/100)
-                    if "level" in args: 
-                        data["brightness"] = round(max(0,min(100,int(args["level"])))*255/100)
-                    # color temp (mireds/kelvin)
-                    if "color_temp_mireds" in args: 
-                        data["color_temp"] = int(args["color_temp_mireds"])
-                    if "color_temp_kelvin" in args: 
-                        data["kelvin"] = int(args["color_temp_kelvin"])
-                    if "color_temp" in args: 
-                        data["color_temp"] = int(args["color_temp"])
-                    # color (hs/rgb/xy) - HA가 알아서 모드 처리
-                    if "hs_color" in args: 
-                        data["hs_color"] = args["hs_color"]
-                    if "rgb_color" in args: 
-                        data["rgb_color"] = args["rgb_color"]
-                    if "xy_color" in args: 
-                        data["xy_color"] = args["xy_color"]
-                    # effect / transition
-                    if "effect" in args: 
-                        data["effect"] = str(args["effect"])
-                    if "transition" in args: 
-                        data["transition"] = float(args["transition"])
-                await self._ha_call("light", command, data)
-                return
-
-        # ----- SWITCH -----
-        if domain == "switch":
-            if command in ("turn_on","turn_off","toggle"):
-                await self._ha_call("switch", command, data)
-                return
-
-        # ----- FAN (percentage/preset/oscillate/direction) -----
-        if domain == "fan":
-            if command in ("turn_on","turn_off","toggle"):
-                await self._ha_call("fan", command, data)
-                return
-            if command in ("set_percentage","set_speed"):
-                pct = args.get("percentage", args.get("level"))
-                if pct is not None: 
-                    data["percentage"] = max(0, min(100, int(pct)))
-                await self._ha_call("fan", "set_percentage", data)
-                return
-            if command == "set_preset_mode" and "preset_mode" in args:
-                data["preset_mode"] = str(args["preset_mode"])
-                await self._ha_call("fan", "set_preset_mode", data)
-                return
-            if command == "oscillate" and "oscillating" in args:
-                data["oscillating"] = bool(args["oscillating"])
-                await self._ha_call("fan", "oscillate", data)
-                return
-            if command == "set_direction" and "direction" in args:
-                data["direction"] = str(args["direction"])
-                await self._ha_call("fan", "set_direction", data)
-                return
-
-        # ----- CLIMATE (mode/setpoint/fan/swing/preset) -----
-        if domain == "climate":
-            if command == "set_hvac_mode" and "hvac_mode" in args:
-                data["hvac_mode"] = str(args["hvac_mode"])
-                await self._ha_call("climate", "set_hvac_mode", data)
-                return
-            if command in ("turn_on","turn_off"):
-                data["hvac_mode"] = "off" if command == "turn_off" else str(args.get("hvac_mode","auto"))
-                await self._ha_call("climate", "set_hvac_mode", data)
-                return
-            if command == "set_temperature":
-                # single / dual setpoint
-                if "temperature" in args: 
-                    data["temperature"] = float(args["temperature"])
-                if "target_temp" in args: 
-                    data["temperature"] = float(args["target_temp"])
-                if "target_temp_low" in args: 
-                    data["target_temp_low"] = float(args["target_temp_low"])
-                if "target_temp_high" in args: 
-                    data["target_temp_high"] = float(args["target_temp_high"])
-                if "hvac_mode" in args: 
-                    data["hvac_mode"] = str(args["hvac_mode"])
-                await self._ha_call("climate", "set_temperature", data)
-                return
-            if command == "set_fan_mode" and "fan_mode" in args:
-                data["fan_mode"] = str(args["fan_mode"])
-                await self._ha_call("climate", "set_fan_mode", data)
-                return
-            if command == "set_swing_mode" and "swing_mode" in args:
-                data["swing_mode"] = str(args["swing_mode"])
-                await self._ha_call("climate", "set_swing_mode", data)
-                return
-            if command == "set_preset_mode" and "preset_mode" in args:
-                data["preset_mode"] = str(args["preset_mode"])
-                await self._ha_call("climate", "set_preset_mode", data)
-                return
-
-        LOGGER.warning("Unhandled command: %s %s %s", entity_id, command, args)
+        handler = _DISPATCH.get((entity_id.partition(".")[0], command))
+        call = handler(args) if handler else None
+        if call is None:
+            LOGGER.warning("Unhandled command: %s %s %s", entity_id, command, args)
+            return
+        domain, service, data = call
+        data["entity_id"] = entity_id
+        await self._ha_call(domain, service, data)
 
     async def _ha_call(self, domain: str, service: str, data: dict[str, Any]) -> None:
         """Call a service on the specified domain and service with the given data."""
@@ -231,9 +314,8 @@ class BridgeCoordinator:
     # =========== State forward ===========
     def get_state_messages(self) -> list[dict[str, Any]]:
         msgs: list[dict[str, Any]] = []
-        selected = set(self.entry.options.get(CONF_ENTITIES, []))
         now_ts = int(dt_util.utcnow().timestamp())
-        for ent_id in sorted(selected):
+        for ent_id in self._selected_sorted:
             st: State | None = self.hass.states.get(ent_id)
             if not st:
                 continue
@@ -241,27 +323,63 @@ class BridgeCoordinator:
                 "type": "state",
                 "entity_id": ent_id,
                 "state": st.state,
-                "attributes": st.attributes,
+                "attributes": _forward_attrs(ent_id, st.attributes),
                 "ts": now_ts,
             })
         return msgs
 
     @callback
-    async def _on_state_changed(self, event) -> None:
-        """Handle state change events."""
-        ent_id = event.data.get("entity_id")
-        ns = event.data.get("new_state")
-        if not ent_id or not ns: 
+    def _on_state_changed(self, event: Event[EventStateChangedData]) -> None:
+        """Handle state change events of the selected entities."""
+        ent_id = event.data["entity_id"]
+        ns = event.data["new_state"]
+        old = event.data["old_state"]
+        # HA reuses the attributes object while attributes are unchanged.
+        if not ns or not old or ns.attributes is not old.attributes:
+            self._entities_cache = None
+        if not ns:
+            self._last_forward.pop(ent_id, None)
+            self._cancel_entity(ent_id)
             return
-        selected = set(self.entry.options.get(CONF_ENTITIES, []))
-        if ent_id not in selected: 
+        attrs = _forward_attrs(ent_id, ns.attributes)
+        sig = (ns.state, attrs)
+        if self._last_forward.get(ent_id) == sig:
             return
+        self._last_forward[ent_id] = sig
         payload = {
             "type": "state",
             "entity_id": ent_id,
             "state": ns.state,
-            "attributes": ns.attributes,
+            "attributes": attrs,
             "ts": int(dt_util.utcnow().timestamp()),
         }
-        if self._server: 
-            await self._server.broadcast(payload)
+        if not self._debounce:
+            if self._server:
+                self._server.broadcast(payload)
+            return
+        # Coalesce bursts: only the latest state within the window is sent
+        self._latest[ent_id] = payload
+        if ent_id not in self._pending:
+            self._pending[ent_id] = self.hass.loop.call_later(
+                self._debounce, self._flush_entity, ent_id
+            )
+
+    @callback
+    def _flush_entity(self, ent_id: str) -> None:
+        """Broadcast the latest pending state of an entity."""
+        self._pending.pop(ent_id, None)
+        payload = self._latest.pop(ent_id, None)
+        if payload and self._server:
+            self._server.broadcast(payload)
+
+    def _cancel_entity(self, ent_id: str) -> None:
+        """Cancel the pending debounced broadcast of one entity."""
+        handle = self._pending.pop(ent_id, None)
+        if handle:
+            handle.cancel()
+        self._latest.pop(ent_id, None)
+
+    def _cancel_pending(self, keep: frozenset[str] = frozenset()) -> None:
+        """Cancel pending debounced broadcasts, except for entities in keep."""
+        for ent_id in [e for e in self._pending if e not in keep]:
+            self._cancel_entity(ent_id)
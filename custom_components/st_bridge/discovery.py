@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import re
 import socket
 import struct
 from typing import Optional
@@ -13,6 +14,18 @@ from .const import LOGGER
 SSDP_GROUP = ("239.255.255.250", 1900)
 SSDP_ST = "urn:st-bridge:service:bridge:1"
 
+_MREQ = struct.pack("=4sl", socket.inet_aton(SSDP_GROUP[0]), socket.INADDR_ANY)
+_RESP_HEAD = (
+    "HTTP/1.1 200 OK\r\n"
+    "CACHE-CONTROL: max-age=60\r\n"
+    "EXT:\r\n"
+    f"ST: {SSDP_ST}\r\n"
+).encode()
+_RESP_SERVER = b"SERVER: st-bridge/1.1 UPnP/1.1 HomeAssistant\r\n"
+
+_ST_MATCH = (SSDP_ST.encode(), b"ssdp:all")
+_HEADER_RE = re.compile(rb"^(ST|MAN)[ \t]*:[ \t]*(.*?)[ \t]*\r?$", re.IGNORECASE | re.MULTILINE)
+
 
 class SSDPResponder:
     """Responds to SSDP M-SEARCH for st-bridge only."""
@@ -23,9 +36,25 @@ class SSDPResponder:
         self.entry = entry
         self.port = port
         self._transport: Optional[asyncio.DatagramTransport] = None
+        self._resp_template: bytes = b""
 
     async def async_start(self) -> None:
         """Start the SSDP responder."""
+        usn = f"uuid:st-bridge-{self.entry.entry_id}"
+        self._resp_template = b"".join((
+            _RESP_HEAD,
+            f"USN: {usn}\r\n".encode(),
+            _RESP_SERVER,
+            (
+                f"BRIDGE-ID: {self.entry.entry_id}\r\n"
+                f"BRIDGE-NAME: ST Bridge\r\n"
+                f"BRIDGE-PORT: {self.port}\r\n"
+                # LOCATION은 정보 제공용(허브는 응답의 송신자 IP를 씀)
+                f"LOCATION: stbridge://%s:{self.port}\r\n"
+                "\r\n"
+            ).encode(),
+        ))
+
         loop = asyncio.get_running_loop()
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -33,9 +62,8 @@ class SSDPResponder:
             sock.bind(("", SSDP_GROUP[1]))
         except OSError:
             sock.bind(("", 0))
-        mreq = struct.pack("=4sl", socket.inet_aton(SSDP_GROUP[0]), socket.INADDR_ANY)
         try:
-            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, _MREQ)
         except OSError:
             pass
         sock.setblocking(False)
@@ -53,46 +81,23 @@ class SSDPResponder:
 
     def _on_datagram(self, data: bytes, addr) -> None:
         """Handle incoming SSDP datagrams."""
-        try:
-            text = data.decode(errors="ignore")
-        except Exception:
+        if data[:8].upper() != b"M-SEARCH":
             return
-        first = text.split("\r\n", 1)[0].upper()
-        if not first.startswith("M-SEARCH"):
-            return
-
-        headers = {}
-        for line in text.split("\r\n"):
-            if ":" in line:
-                k, v = line.split(":", 1)
-                headers[k.strip().upper()] = v.strip()
 
-        st = headers.get("ST", "")
-        man = headers.get("MAN", "")
-        if not (st in (SSDP_ST, "ssdp:all") and "ssdp:discover" in man):
+        st = man = b""
+        for name, value in _HEADER_RE.findall(data):
+            if name.upper() == b"ST":
+                st = value
+            else:
+                man = value
+        if not (st in _ST_MATCH and b"ssdp:discover" in man):
             return
 
+        if not self._transport:
+            return
         ip, port = addr[0], addr[1]
-        usn = f"uuid:st-bridge-{self.entry.entry_id}"
-        payload = (
-            "HTTP/1.1 200 OK\r\n"
-            "CACHE-CONTROL: max-age=60\r\n"
-            "EXT:\r\n"
-            f"ST: {SSDP_ST}\r\n"
-            f"USN: {usn}\r\n"
-            "SERVER: st-bridge/1.1 UPnP/1.1 HomeAssistant\r\n"
-            f"BRIDGE-ID: {self.entry.entry_id}\r\n"
-            f"BRIDGE-NAME: ST Bridge\r\n"
-            f"BRIDGE-PORT: {self.port}\r\n"
-            # LOCATION은 정보 제공용(허브는 응답의 송신자 IP를 씀)
-            f"LOCATION: stbridge://{ip}:{self.port}\r\n"
-            "\r\n"
-        ).encode()
-
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-                s.setblocking(False)
-                s.sendto(payload, (ip, port))
+            self._transport.sendto(self._resp_template % ip.encode(), (ip, port))
         except Exception:
             pass
 
@@ -1,15 +1,105 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import socket
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
 from typing import Any, Callable, Optional
 
 from .const import LOGGER
 
+try:
+    import orjson
+
+    def _encode(obj: Any) -> bytes:
+        """Encode an object as one newline-terminated JSON frame."""
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    def _encode(obj: Any) -> bytes:
+        """Encode an object as one newline-terminated JSON frame."""
+        return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+    _loads = json.loads
+
 JsonObj = dict[str, Any]
 GetEntitiesCB = Callable[[], list[JsonObj]]
 GetStateMsgsCB = Callable[[], list[JsonObj]]
-CallServiceCB = Callable[[str, str, dict[str, Any]], asyncio.Future | None]
+CallServiceCB = Callable[[str, str, Mapping[str, Any]], asyncio.Future | None]
+
+# Shared read-only default for commands without args; handlers must not mutate args
+_EMPTY_ARGS: Mapping[str, Any] = MappingProxyType({})
+
+# Upper bound for a single protocol line (also the StreamReader buffer limit)
+MAX_LINE = 65536
+
+# Connections from the same address closer together than this are dropped
+MIN_CONNECT_INTERVAL = 0.05
+RECENT_PEERS_MAX = 256
+
+# Clients sending more than MAX_ERRORS bad lines within ERROR_WINDOW seconds are dropped
+MAX_ERRORS = 20
+ERROR_WINDOW = 1.0
+
+# Frames queued for one client before it is considered stuck and dropped
+SEND_QUEUE_SIZE = 256
+
+# Kernel send buffer for client sockets, so bursts of state frames rarely hit drain()
+SEND_BUFFER_SIZE = 1 << 20
+
+# Frame sequence on connect:
+#   server -> hello, entity_list
+#   client -> {"type":"ready"} once it has processed entity_list
+#   server -> one state frame per entity
+# Clients that never send ready get the states after STATE_DUMP_DELAY.
+STATE_DUMP_DELAY = 0.8
+
+# Optional length-prefixed framing:
+#   client -> {"type":"hello_v2"} (last newline-terminated line it sends)
+#   server -> {"type":"hello_v2","framing":"length"} (last newline-terminated line)
+# From then on every frame in both directions is a 4-byte big-endian
+# length followed by that many bytes of JSON, at most MAX_LINE.
+
+# Constant frames, encoded once
+HELLO = _encode({"type":"hello","bridge":"st-bridge","version":"0.0.4"})
+PONG = _encode({"type":"pong"})
+HELLO_V2 = _encode({"type":"hello_v2","framing":"length"})
+ERR = {
+    code: _encode({"type":"error","code":code})
+    for code in ("bad_json", "bad_command")
+}
+
+
+def _length_framed(frame: bytes) -> bytes:
+    """Re-frame one newline-terminated JSON frame with a length prefix."""
+    body = frame[:-1]
+    return len(body).to_bytes(4, "big") + body
+
+
+# Length-framed variants of the constant replies
+FRAMED = {frame: _length_framed(frame) for frame in (PONG, *ERR.values())}
+
+
+class _Client:
+    """Send-side state of one client connection."""
+
+    __slots__ = ("writer", "peer", "queue", "pump", "state_dump", "states_sent", "length_framed")
+
+    def __init__(self, writer: asyncio.StreamWriter, peer) -> None:
+        """Initialize the client."""
+        self.writer = writer
+        self.peer = peer
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.pump: asyncio.Task | None = None
+        self.state_dump: asyncio.Task | None = None
+        self.states_sent = False
+        self.length_framed = False
+
 
 class BridgeServer:
     """TCP server for st-bridge protocol."""
@@ -29,23 +119,23 @@ class BridgeServer:
         self._call = call_service
         self._get_states = get_state_messages
         self._server: asyncio.base_events.Server | None = None
-        self._clients: set[asyncio.StreamWriter] = set()
-        self._lock = asyncio.Lock()
+        # Only touched from the event loop, so no lock is needed
+        self._clients: set[_Client] = set()
+        # Immutable copy of _clients, refreshed on add/remove, for iteration
+        self._snapshot: tuple[_Client, ...] = ()
+        self._recent: OrderedDict[str, float] = OrderedDict()
 
     async def start(self) -> None:
         """Start the ST Bridge server."""
-        self._server = await asyncio.start_server(self._handle, "0.0.0.0", self._port)
+        self._server = await asyncio.start_server(
+            self._handle, "0.0.0.0", self._port, limit=MAX_LINE
+        )
         LOGGER.info("ST Bridge TCP server listening on %d", self._port)
 
     async def async_close(self) -> None:
         """Close the ST Bridge server."""
-        async with self._lock:
-            for w in list(self._clients):
-                try: 
-                    w.close()
-                except Exception: 
-                    pass
-            self._clients.clear()
+        for client in self._snapshot:
+            self._drop(client, abort=True)
         if self._server:
             self._server.close()
             try: 
@@ -54,113 +144,255 @@ class BridgeServer:
                 pass
             self._server = None
 
-    async def broadcast(self, obj: JsonObj) -> None:
-        """Broadcast a message to all connected clients."""
-        data = (json.dumps(obj, ensure_ascii=False) + "\n").encode()
-        async with self._lock:
-            for w in list(self._clients):
-                try:
-                    w.write(data)
-                    await w.drain()
-                except Exception:
-                    self._clients.discard(w)
+    def broadcast(self, obj: JsonObj) -> None:
+        """Broadcast a message to all connected clients; call from the event loop."""
+        if not self._snapshot:
+            return
+        data = _encode(obj)
+        framed = None
+        # Each client's pump writes and drains on its own, so a slow client
+        # never holds up the others or the caller
+        for client in self._snapshot:
+            if client.length_framed:
+                if framed is None:
+                    framed = _length_framed(data)
+                self._enqueue(client, framed)
+            else:
+                self._enqueue(client, data)
 
-    async def broadcast_entity_list(self, entities: list[JsonObj]) -> None:
+    def broadcast_entity_list(self, entities: list[JsonObj]) -> None:
         """Broadcast the current entity list to all connected clients."""
-        await self.broadcast({"type":"entity_list","entities": entities})
+        if not self._snapshot:
+            return
+        self.broadcast({"type":"entity_list","entities": entities})
 
     async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
         """Handle a new client connection."""
         peer = writer.get_extra_info("peername")
         #LOGGER.info("Client connected: %s", peer)
-
-        async with self._lock: 
-            self._clients.add(writer)
-        await self._send(writer, {"type":"hello","bridge":"st-bridge","version":"0.0.4"})
-        await self._send(writer, {"type":"entity_list","entities": self._get()})
-        if self._get_states:
+        if peer and self._too_soon(peer[0]):
+            # Connection flood: abort without the orderly close handshake
+            writer.transport.abort()
+            return
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
             try:
-                await asyncio.sleep(0.8)
-                for msg in self._get_states():
-                    await self._safe_send(writer, msg)
-            except Exception:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_SIZE)
+            except OSError:
                 pass
 
-        buffer = b""
+        client = _Client(writer, peer)
+        self._clients.add(client)
+        self._snapshot = tuple(self._clients)
+        client.pump = asyncio.create_task(self._pump(client))
+
+        err_count = 0
+        err_since = 0.0
         try:
-            while not reader.at_eof():
-                try:
-                    chunk = await reader.read(1024)
-                except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
+            self._enqueue(client, HELLO)
+            self._enqueue(client, _encode({"type":"entity_list","entities": self._get()}))
+            if self._get_states:
+                client.state_dump = asyncio.create_task(self._send_states_later(client))
+
+            while True:
+                line = await self._read_frame(reader, client)
+                if line is None:
                     break
-                except Exception as e:
-                    LOGGER.debug("Read error from %s: %r", peer, e)
+                line = line.strip()
+                if not line:
+                    continue
+                if not await self._on_line(client, line):
+                    err_count = 0
+                    continue
+                now = time.monotonic()
+                if now - err_since > ERROR_WINDOW:
+                    err_since = now
+                    err_count = 0
+                err_count += 1
+                if err_count > MAX_ERRORS:
+                    LOGGER.debug("Dropping %s after %d bad lines", peer, err_count)
                     break
+        except Exception as e:
+            LOGGER.debug("Connection error with %s: %r", peer, e)
+        finally:
+            await self._safe_close(client)
 
-                if not chunk:
-                    break
+    async def _read_frame(self, reader: asyncio.StreamReader, client: _Client) -> bytes | None:
+        """Read the next frame from a client; None when the connection is done."""
+        discard = False
+        while True:
+            try:
+                if client.length_framed:
+                    size = int.from_bytes(await reader.readexactly(4), "big")
+                    if size > MAX_LINE:
+                        LOGGER.debug("Frame of %d bytes from %s exceeds limit", size, client.peer)
+                        return None
+                    return await reader.readexactly(size)
+                line = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError:
+                return None
+            except asyncio.LimitOverrunError as e:
+                # Drop the oversized line up to and including its newline
+                try:
+                    await reader.readexactly(e.consumed)
+                except Exception:
+                    return None
+                discard = True
+                continue
+            except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
+                return None
+            except Exception as e:
+                LOGGER.debug("Read error from %s: %r", client.peer, e)
+                return None
 
-                buffer += chunk
-                while True:
-                    nl = buffer.find(b"\n")
-                    if nl < 0:
-                        break
-                    line = buffer[:nl].decode(errors="ignore").strip()
-                    buffer = buffer[nl + 1 :]
-                    if not line:
-                        continue
-                    await self._on_line(writer, line)
-        finally:
-            await self._safe_close(writer, peer)
+            if discard:
+                discard = False
+                continue
+            return line
 
-    async def _on_line(self, writer: asyncio.StreamWriter, line: str) -> None:
-        """Handle a line of input from a client."""
+    def _too_soon(self, ip: str) -> bool:
+        """Record a connection from ip and tell whether it came too quickly."""
+        now = time.monotonic()
+        last = self._recent.pop(ip, None)
+        self._recent[ip] = now
+        if len(self._recent) > RECENT_PEERS_MAX:
+            self._recent.popitem(last=False)
+        return last is not None and now - last < MIN_CONNECT_INTERVAL
+
+    async def _on_line(self, client: _Client, line: bytes) -> bool:
+        """Handle a line of input from a client; return True if it was rejected."""
         try:
-            msg = json.loads(line)
+            msg = _loads(line)
         except Exception:
-            await self._send(writer, {"type":"error","code":"bad_json"})
-            return
+            msg = None
+        if not isinstance(msg, dict):
+            self._reply(client, ERR["bad_json"])
+            return True
         t = msg.get("type")
         if t=="ping": 
-            await self._send(writer, {"type":"pong"})
-            return
+            self._reply(client, PONG)
+            return False
+        if t=="hello_v2":
+            if client.length_framed:
+                # Already negotiated; a newline-terminated ack would desync the stream
+                return True
+            # The acknowledgement is the last newline-terminated frame
+            self._enqueue(client, HELLO_V2)
+            client.length_framed = True
+            return False
+        if t=="ready":
+            if client.states_sent:
+                # One dump per connection; repeats count towards the error limit
+                return True
+            if client.state_dump:
+                client.state_dump.cancel()
+                client.state_dump = None
+            self._send_states(client)
+            return False
         if t=="command":
             ent = msg.get("entity_id")
             cmd = msg.get("command")
-            args = msg.get("args",{}) or {}
+            args = msg.get("args") or _EMPTY_ARGS
             if isinstance(ent,str) and isinstance(cmd,str):
-                await self._call(ent, cmd, args) # type: ignore
+                try:
+                    await self._call(ent, cmd, args) # type: ignore
+                except Exception as e:
+                    LOGGER.warning("Command failed: %s %s %s: %r", ent, cmd, args, e)
+                    self._reply(client, ERR["bad_command"])
+                    return True
             else:
-                await self._send(writer, {"type":"error","code":"bad_command"})
+                self._reply(client, ERR["bad_command"])
+                return True
+        return False
+
+    async def _send_states_later(self, client: _Client) -> None:
+        """Send the state dump to a client that did not announce ready."""
+        await asyncio.sleep(STATE_DUMP_DELAY)
+        client.state_dump = None
+        try:
+            self._send_states(client)
+        except Exception as e:
+            LOGGER.debug("State dump to %s failed: %r", client.peer, e)
+
+    def _send_states(self, client: _Client) -> None:
+        """Queue the current state of every exposed entity for a client."""
+        if not self._get_states:
             return
+        client.states_sent = True
+        # A single queue entry, so the dump never counts against the queue bound per entity
+        frames = (_encode(msg) for msg in self._get_states())
+        if client.length_framed:
+            frames = (_length_framed(f) for f in frames)
+        self._enqueue(client, b"".join(frames))
+
+    def _reply(self, client: _Client, frame: bytes) -> None:
+        """Queue a constant frame in the framing the client has negotiated."""
+        self._enqueue(client, FRAMED[frame] if client.length_framed else frame)
+
+    def _enqueue(self, client: _Client, data: bytes) -> None:
+        """Queue an encoded frame for a client, dropping the client if it is stuck."""
+        try:
+            client.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            LOGGER.debug("Send queue to %s is full, dropping client", client.peer)
+            self._drop(client, abort=True)
+
+    async def _pump(self, client: _Client) -> None:
+        """Write queued frames to a client; the only writer of its stream."""
+        queue = client.queue
+        writer = client.writer
+        try:
+            while True:
+                # Flush everything that queued up while the last drain was pending
+                frames = [await queue.get()]
+                while not queue.empty():
+                    frames.append(queue.get_nowait())
+                writer.writelines(frames)
+                await writer.drain()
+        except Exception as e:
+            LOGGER.debug("Write to %s failed: %r", client.peer, e)
+            self._drop(client)
+
+    def _drop(self, client: _Client, abort: bool = False) -> None:
+        """Unregister a client, stop its tasks and close its stream.
 
-    async def _safe_send(self, writer: asyncio.StreamWriter, obj: JsonObj) -> None:
-        """Send a JSON object to a client, ignoring errors."""
+        With abort the unsent buffer is discarded, so a peer that stopped
+        reading cannot keep the socket (and its reader task) alive.
+        """
+        if client in self._clients:
+            self._clients.discard(client)
+            self._snapshot = tuple(self._clients)
+        current = asyncio.current_task()
+        for task in (client.pump, client.state_dump):
+            if task and task is not current:
+                task.cancel()
         try:
-            writer.write((json.dumps(obj, ensure_ascii=False) + "\n").encode())
-            await writer.drain()
+            if abort:
+                client.writer.transport.abort()
+            else:
+                client.writer.close()
         except Exception:
             pass
 
-    async def _safe_close(self, writer: asyncio.StreamWriter, peer) -> None:
+    async def _safe_close(self, client: _Client) -> None:
         """Close the connection to a client, ignoring errors."""
-        async with self._lock:
-            self._clients.discard(writer)
+        writer = client.writer
+        if writer.transport.is_closing():
+            # Already closed or aborted; queued frames have nowhere to go
+            self._drop(client)
+            return
+        # Hand frames still queued (e.g. a final error reply) to the transport,
+        # which flushes them before closing
+        frames = []
+        while not client.queue.empty():
+            frames.append(client.queue.get_nowait())
         try:
-            writer.close()
+            writer.writelines(frames)
         except Exception:
             pass
+        self._drop(client)
         try:
-            if hasattr(writer, "wait_closed"):
-                await asyncio.wait_for(writer.wait_closed(), timeout=0.5)
+            await asyncio.wait_for(writer.wait_closed(), timeout=0.5)
         except Exception:
             pass
-        #LOGGER.info("Client disconnected: %s", peer)
-
-    async def _send(self, writer: asyncio.StreamWriter, obj: JsonObj) -> None:
-        """Send a JSON object to a client."""
-        try:
-            writer.write((json.dumps(obj, ensure_ascii=False)+"\n").encode())
-            await writer.drain()
-        except Exception: 
-            pass
+        #LOGGER.info("Client disconnected: %s", client.peer)